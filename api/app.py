@@ -6,6 +6,9 @@ from routes.predict import predict_bp
 from routes.history import history_bp
 from routes.anomaly import anomaly_bp
 from routes.receiver import receiver_bp
+from routes.shadow import shadow_bp
+from services.semantic_index import get_index
+from services.shadow_service import start_shadow_worker
 
 def create_app():
     app = Flask(__name__)
@@ -14,6 +17,12 @@ def create_app():
     # Initialise SQLite on startup
     init_db()
 
+    # Build the semantic root-cause index once, before the first request
+    get_index()
+
+    # Evaluate a candidate model in the background if one is present
+    start_shadow_worker()
+
     # Init SocketIO with app
     socketio.init_app(app)
 
@@ -22,6 +31,7 @@ def create_app():
     app.register_blueprint(history_bp)
     app.register_blueprint(anomaly_bp)
     app.register_blueprint(receiver_bp)
+    app.register_blueprint(shadow_bp)
 
     return app
 
@@ -0,0 +1,273 @@
+"""
+Backfill
+--------
+Bulk re-scores archived error logs with the current model and root cause
+rules and stores the results in the predictions DB, bypassing the HTTP API
+and the Socket.IO broadcast.
+
+Usage (from the api/ directory):
+    python backfill.py ../data/bugs.csv
+    python backfill.py archive-2024-06.jsonl --workers 8 --chunk-size 50000
+
+Input is CSV or JSON lines (optionally compressed, e.g. ``.csv.gz``) with an
+``error_message`` column and optional ``user_count``, ``app_source`` and
+``timestamp`` columns; any other columns (such as ``severity``) are ignored.
+Rows without a parseable timestamp are stored with ``UNKNOWN_TIMESTAMP`` so
+archive data never shows up as recent traffic. Rows with an empty message
+are skipped, and negative user counts are clipped to 0.
+
+Strategy:
+  - Stream the input in chunks so memory stays flat for any file size.
+  - Score each chunk in a worker process with the vectorised
+    ``predict_batch`` / ``analyze_errors`` helpers. ``analyze_errors`` never
+    teaches the semantic index, so every worker classifies against the same
+    seeded index and the output does not depend on chunk scheduling.
+  - Insert each scored chunk with one ``executemany`` and advance the
+    checkpoint for the file in the same transaction, so an interrupted run
+    resumes from the last stored chunk.
+  - Suspend the per-row full-text index trigger for the load and index the
+    new id range in bulk afterwards (``suspend_search_index`` /
+    ``backfill_search_index``), which is several times cheaper than indexing
+    row by row.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from db.database import (
+    init_db, save_predictions_bulk, get_backfill_checkpoint, UNKNOWN_TIMESTAMP,
+    suspend_search_index, resume_search_index, backfill_search_index,
+)
+
+_DEFAULT_CHUNK_SIZE = 20_000
+# Chunks scored ahead of the writer, per worker
+_PREFETCH_PER_WORKER = 2
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _is_jsonl(path: str) -> bool:
+    name = path.lower()
+    for ext in (".gz", ".bz2", ".xz", ".zip", ".zst"):
+        if name.endswith(ext):
+            name = name[: -len(ext)]
+    return name.endswith((".jsonl", ".ndjson"))
+
+
+def _read_chunks(path: str, chunk_size: int, skip: int):
+    """
+    Yield DataFrame chunks of *path*, starting after the first *skip* rows.
+    Rows are counted as parsed (blank CSV lines are not rows), the same way
+    run_backfill() counts them for the checkpoint.
+    """
+    if _is_jsonl(path):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size, dtype={"error_message": str})
+
+    seen = 0
+    for chunk in reader:
+        if seen + len(chunk) <= skip:
+            seen += len(chunk)
+            continue
+        if seen < skip:
+            chunk = chunk.iloc[skip - seen:]
+        seen += len(chunk)
+        yield chunk
+
+
+def _init_worker():
+    """
+    Load the model and the seeded semantic index once per worker process.
+    Scoring only reads the index (see analyze_errors), so it stays identical
+    across workers and runs.
+    """
+    from services.model_service import load_model
+    from services.semantic_index import get_index
+
+    load_model()
+    get_index()
+
+
+def _score_chunk(chunk: pd.DataFrame) -> tuple[list[tuple], int]:
+    """
+    Score one chunk. Returns rows ready for save_predictions_bulk() and the
+    number of input rows skipped for having no error message.
+    """
+    from services.model_service import predict_batch
+    from services.root_cause_engine import analyze_errors
+
+    if "error_message" not in chunk.columns:
+        raise ValueError("input has no 'error_message' column")
+
+    messages = chunk["error_message"].fillna("").astype(str).str.strip()
+    keep = messages != ""
+    skipped = int((~keep).sum())
+    chunk, messages = chunk[keep], messages[keep]
+    if chunk.empty:
+        return [], skipped
+
+    # log1p() of a negative count is NaN, which the NOT NULL score rejects
+    if "user_count" in chunk.columns:
+        user_counts = (
+            pd.to_numeric(chunk["user_count"], errors="coerce")
+            .fillna(1).clip(lower=0).astype(int)
+        )
+    else:
+        user_counts = pd.Series(1, index=chunk.index)
+
+    # Normalise to the "%Y-%m-%d %H:%M:%S" UTC form the anomaly detector
+    # compares as strings; missing or unparseable values become unknown
+    if "timestamp" in chunk.columns:
+        raw = chunk["timestamp"]
+        if pd.api.types.is_numeric_dtype(raw):
+            parsed = pd.to_datetime(raw, unit="s", errors="coerce", utc=True)
+        else:
+            parsed = pd.to_datetime(raw, format="mixed", errors="coerce", utc=True)
+        timestamps = (
+            parsed.dt.strftime("%Y-%m-%d %H:%M:%S").fillna(UNKNOWN_TIMESTAMP).tolist()
+        )
+    else:
+        timestamps = [UNKNOWN_TIMESTAMP] * len(chunk)
+
+    # Same "[source] message" form that /api/v1/receive stores
+    if "app_source" in chunk.columns:
+        sources = chunk["app_source"].fillna("").astype(str)
+        stored = ("[" + sources + "] " + messages).where(sources != "", messages)
+    else:
+        stored = messages
+
+    message_list = messages.tolist()
+    user_count_list = user_counts.tolist()
+    result = predict_batch(message_list, user_count_list)
+    analyses = analyze_errors(message_list)
+
+    rows = [
+        (
+            msg,
+            users,
+            severity,
+            round(confidence, 4),
+            round(impact, 4),
+            analysis["category"],
+            analysis["root_cause"],
+            analysis["suggested_fix"],
+            ts,
+        )
+        for msg, users, severity, confidence, impact, analysis, ts in zip(
+            stored.tolist(),
+            user_count_list,
+            result["severity"],
+            result["confidence"],
+            result["impact_score"],
+            analyses,
+            timestamps,
+        )
+    ]
+    return rows, skipped
+
+
+def _report(rows_done: int, rows_this_run: int, skipped: int, started: float) -> None:
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(
+        f"  {rows_done:>12,} rows done | {rows_this_run / elapsed:>10,.0f} rows/sec"
+        f" | {skipped:,} skipped",
+        flush=True,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def run_backfill(path: str, chunk_size: int = _DEFAULT_CHUNK_SIZE,
+                 workers: int | None = None, restart: bool = False) -> int:
+    """Score *path* into the predictions DB. Returns rows processed this run."""
+    # No background FTS backfill: it would compete with the writer below for
+    # the write lock and be forked into the worker processes
+    init_db(background_backfill=False)
+    source = os.path.abspath(path)
+    skip = 0 if restart else get_backfill_checkpoint(source)
+    workers = workers or os.cpu_count() or 1
+
+    if skip:
+        print(f"↪ Resuming {path} after {skip:,} rows")
+    print(f"🚀 Backfilling {path} with {workers} worker(s), {chunk_size:,} rows/chunk")
+
+    rows_done = skip
+    rows_this_run = 0
+    skipped = 0
+    started = time.perf_counter()
+
+    def store(chunk_len: int, scored: tuple[list[tuple], int]) -> None:
+        nonlocal rows_done, rows_this_run, skipped
+        rows, chunk_skipped = scored
+        rows_done += chunk_len
+        rows_this_run += chunk_len
+        skipped += chunk_skipped
+        save_predictions_bulk(rows, checkpoint_source=source, rows_done=rows_done)
+        _report(rows_done, rows_this_run, skipped, started)
+
+    suspend_search_index(verbose=True)
+    try:
+        chunks = _read_chunks(path, chunk_size, skip)
+
+        if workers == 1:
+            _init_worker()
+            for chunk in chunks:
+                store(len(chunk), _score_chunk(chunk))
+        else:
+            # Bounded window of in-flight chunks, written back in input order
+            pending = deque()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                for chunk in chunks:
+                    pending.append((len(chunk), pool.submit(_score_chunk, chunk)))
+                    if len(pending) >= workers * _PREFETCH_PER_WORKER:
+                        chunk_len, future = pending.popleft()
+                        store(chunk_len, future.result())
+                while pending:
+                    chunk_len, future = pending.popleft()
+                    store(chunk_len, future.result())
+    finally:
+        # Even when interrupted, so live inserts are indexed again; the rows
+        # loaded so far are left for the next backfill of the search index
+        resume_search_index()
+
+    print("🔎 Indexing the new rows for search")
+    backfill_search_index()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ {rows_this_run:,} rows in {elapsed:.1f}s "
+        f"({rows_this_run / max(elapsed, 1e-9):,.0f} rows/sec, {skipped:,} skipped)"
+    )
+    return rows_this_run
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-score archived error logs into the predictions DB."
+    )
+    parser.add_argument("input", help="CSV or JSON-lines file of error logs")
+    parser.add_argument("--chunk-size", type=int, default=_DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="scoring processes (default: CPU count)")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the saved checkpoint and start from the first row")
+    args = parser.parse_args()
+
+    try:
+        run_backfill(args.input, args.chunk_size, args.workers, args.restart)
+    except KeyboardInterrupt:
+        print("\n⏸ Interrupted — run again to resume from the last stored chunk.")
+        sys.exit(130)
@@ -1,11 +1,28 @@
 import sqlite3
 import os
+import re
+import threading
 from datetime import datetime
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "predictions.db")
 
+# Stored in `timestamp` when the real time of an event is not known (e.g.
+# archived logs without one). It sorts before every real timestamp, so the
+# anomaly detector's `timestamp >= ?` window never counts these rows.
+UNKNOWN_TIMESTAMP = ""
 
-def init_db():
+# Columns of `predictions` mirrored into the full-text index
+_FTS_COLUMNS = ("error_message", "error_category", "root_cause")
+_SEARCH_MAX_LIMIT = 200
+# Only the newest matches are bm25-ranked, so a broad term costs the same
+# on ten thousand rows as on tens of millions; older matches are not returned
+_SEARCH_RANK_CANDIDATES = 5_000
+# Pre-existing rows indexed per transaction by backfill_search_index()
+# (small, so live writers wait milliseconds for the write lock, not seconds)
+_FTS_BACKFILL_BATCH = 2_000
+
+
+def init_db(background_backfill: bool = True):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
@@ -37,9 +54,250 @@ def init_db():
         except sqlite3.OperationalError:
             pass  # column already present
 
+    # Progress of resumable bulk backfills, keyed by input file
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+            source     TEXT    PRIMARY KEY,
+            rows_done  INTEGER NOT NULL,
+            updated_at TEXT    NOT NULL
+        )
+    """)
+
+    # Shadow-model evaluations, one row per sampled live prediction
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shadow_predictions (
+            id                   INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_id        INTEGER,
+            shadow_model         TEXT    NOT NULL,
+            user_count           INTEGER NOT NULL,
+            live_severity        TEXT    NOT NULL,
+            live_confidence      REAL    NOT NULL,
+            shadow_severity      TEXT    NOT NULL,
+            shadow_confidence    REAL    NOT NULL,
+            agree                INTEGER NOT NULL,
+            confidence_delta     REAL    NOT NULL,
+            live_preprocess_ms   REAL    NOT NULL,
+            live_classify_ms     REAL    NOT NULL,
+            shadow_preprocess_ms REAL    NOT NULL,
+            shadow_classify_ms   REAL    NOT NULL,
+            timestamp            TEXT    NOT NULL
+        )
+    """)
+
+    _init_search_index(cursor)
+
     conn.commit()
     conn.close()
 
+    # Rows that predate the index are indexed in the background, so a large
+    # database does not hold up startup; search covers them as it proceeds
+    if background_backfill and search_backfill_pending():
+        threading.Thread(
+            target=backfill_search_index, name="fts-backfill", daemon=True
+        ).start()
+
+
+def _init_search_index(cursor):
+    """
+    Create the FTS5 index over `predictions`, the triggers that keep it in
+    sync and its backfill state, all in one transaction.
+
+    Rows inserted from then on are indexed by the triggers. Rows that were
+    already there (ids up to `high_water`) are left to
+    backfill_search_index(), which records its progress in `done_through`.
+
+    On an existing index, only restores the insert trigger if a bulk load
+    stopped while the index was suspended.
+    """
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'predictions_fts'"
+    )
+    if cursor.fetchone() is not None:
+        cursor.execute("BEGIN")
+        _restore_fts_insert_trigger(cursor)
+        return
+
+    cursor.execute("BEGIN")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS search_index_state (
+            id           INTEGER PRIMARY KEY CHECK (id = 1),
+            high_water   INTEGER NOT NULL,
+            done_through INTEGER NOT NULL
+        )
+    """)
+
+    cols = ", ".join(_FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in _FTS_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in _FTS_COLUMNS)
+
+    # External-content table: the text lives only in `predictions`
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS predictions_fts USING fts5(
+            {cols},
+            content='predictions',
+            content_rowid='id',
+            tokenize='unicode61',
+            prefix='2 3 4'
+        )
+    """)
+    _create_fts_insert_trigger(cursor)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS predictions_fts_ad AFTER DELETE ON predictions BEGIN
+            INSERT INTO predictions_fts(predictions_fts, rowid, {cols})
+            VALUES ('delete', old.id, {old_cols});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS predictions_fts_au AFTER UPDATE ON predictions BEGIN
+            INSERT INTO predictions_fts(predictions_fts, rowid, {cols})
+            VALUES ('delete', old.id, {old_cols});
+            INSERT INTO predictions_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+    cursor.execute("""
+        INSERT INTO search_index_state (id, high_water, done_through)
+        SELECT 1, COALESCE(MAX(id), 0), 0 FROM predictions
+    """)
+
+
+def _create_fts_insert_trigger(cursor):
+    cols = ", ".join(_FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in _FTS_COLUMNS)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS predictions_fts_ai AFTER INSERT ON predictions BEGIN
+            INSERT INTO predictions_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+
+
+def _restore_fts_insert_trigger(cursor) -> bool:
+    """
+    Recreate the insert trigger if suspend_search_index() removed it, and
+    raise `high_water` over the rows inserted without it, so that
+    backfill_search_index() indexes them. Returns True if it was missing.
+    """
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'predictions_fts_ai'"
+    )
+    if cursor.fetchone() is not None:
+        return False
+    _create_fts_insert_trigger(cursor)
+    cursor.execute("""
+        UPDATE search_index_state
+        SET high_water = MAX(high_water, (SELECT COALESCE(MAX(id), 0) FROM predictions))
+    """)
+    return True
+
+
+def suspend_search_index(verbose: bool = False):
+    """
+    Stop indexing inserted rows one at a time, ahead of a bulk load. Call
+    resume_search_index() when the load is done and then
+    backfill_search_index() to index everything inserted in between in
+    bulk. Rows inserted meanwhile, by any writer, are not searchable until
+    that backfill reaches them.
+
+    If the process dies while suspended, the next init_db() restores the
+    trigger and queues the missed rows for backfill.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    try:
+        while True:
+            # Everything below the trigger's coverage must already be indexed,
+            # so that the rows it misses form one id range starting at MAX(id)
+            backfill_search_index(verbose=verbose)
+            conn.execute("BEGIN IMMEDIATE")
+            high_water, done_through = conn.execute(
+                "SELECT high_water, done_through FROM search_index_state"
+            ).fetchone()
+            if done_through >= high_water:
+                break
+            conn.execute("ROLLBACK")
+        conn.execute("DROP TRIGGER IF EXISTS predictions_fts_ai")
+        conn.execute("""
+            UPDATE search_index_state
+            SET high_water   = MAX(high_water, (SELECT COALESCE(MAX(id), 0) FROM predictions)),
+                done_through = MAX(high_water, (SELECT COALESCE(MAX(id), 0) FROM predictions))
+        """)
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def resume_search_index():
+    """
+    Undo suspend_search_index(): index inserted rows again from now on and
+    queue the rows inserted while suspended for backfill_search_index().
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _restore_fts_insert_trigger(conn.cursor())
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def search_backfill_pending() -> bool:
+    """True while rows that predate the full-text index are not yet indexed."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT high_water, done_through FROM search_index_state")
+    row = cursor.fetchone()
+    conn.close()
+    return row is not None and row[1] < row[0]
+
+
+def backfill_search_index(batch_size: int = _FTS_BACKFILL_BATCH, verbose: bool = False) -> int:
+    """
+    Index the rows that existed before the full-text index was created.
+
+    Works through them in id order, *batch_size* rows per transaction, and
+    commits its progress with each batch, so it can be interrupted and
+    re-run at any time. Returns the number of rows indexed by this call.
+    """
+    cols = ", ".join(_FTS_COLUMNS)
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    indexed = 0
+    try:
+        while True:
+            # IMMEDIATE: read the progress under the write lock so two
+            # concurrent backfills never index the same range twice
+            conn.execute("BEGIN IMMEDIATE")
+            high_water, done_through = conn.execute(
+                "SELECT high_water, done_through FROM search_index_state"
+            ).fetchone()
+            if done_through >= high_water:
+                conn.execute("COMMIT")
+                break
+            upper = min(done_through + batch_size, high_water)
+            cursor = conn.execute(f"""
+                INSERT INTO predictions_fts(rowid, {cols})
+                SELECT id, {cols} FROM predictions WHERE id > ? AND id <= ?
+            """, (done_through, upper))
+            indexed += max(cursor.rowcount, 0)
+            conn.execute(
+                "UPDATE search_index_state SET done_through = ?", (upper,)
+            )
+            conn.execute("COMMIT")
+            if verbose:
+                print(f"  indexed ids {done_through + 1:,}–{upper:,} of {high_water:,}")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return indexed
+
 
 def save_prediction(
     error_message: str,
@@ -75,6 +333,100 @@ def save_prediction(
     return prediction_id
 
 
+def save_predictions_bulk(rows, checkpoint_source: str = None, rows_done: int = 0):
+    """
+    Insert many predictions in one transaction. Each row is a tuple in
+    column order: (error_message, user_count, predicted_severity, confidence,
+    impact_score, error_category, root_cause, suggested_fix, timestamp).
+
+    When *checkpoint_source* is given, its checkpoint is advanced to
+    *rows_done* in the same transaction, so a resumed backfill never
+    inserts a chunk twice.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA synchronous = NORMAL")
+    with conn:
+        conn.executemany("""
+            INSERT INTO predictions
+              (error_message, user_count, predicted_severity, confidence,
+               impact_score, error_category, root_cause, suggested_fix, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        if checkpoint_source is not None:
+            conn.execute("""
+                INSERT INTO backfill_checkpoints (source, rows_done, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                  rows_done = excluded.rows_done,
+                  updated_at = excluded.updated_at
+            """, (
+                checkpoint_source,
+                rows_done,
+                datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+            ))
+    conn.close()
+
+
+def get_backfill_checkpoint(source: str) -> int:
+    """Number of input rows already stored for *source* (0 if none)."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT rows_done FROM backfill_checkpoints WHERE source = ?", (source,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+
+def save_shadow_predictions(records):
+    """Insert shadow evaluations in one transaction; record keys match the columns."""
+    columns = [
+        "prediction_id", "shadow_model", "user_count",
+        "live_severity", "live_confidence", "shadow_severity", "shadow_confidence",
+        "agree", "confidence_delta",
+        "live_preprocess_ms", "live_classify_ms",
+        "shadow_preprocess_ms", "shadow_classify_ms",
+    ]
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany(
+        f"INSERT INTO shadow_predictions ({', '.join(columns)}, timestamp) "
+        f"VALUES ({', '.join('?' for _ in columns)}, ?)",
+        [[r.get(c) for c in columns] + [now] for r in records],
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_shadow_summary(shadow_model: str = None):
+    """Aggregate agreement, confidence deltas and stage latencies per shadow model."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    where = "WHERE shadow_model = ?" if shadow_model else ""
+    cursor.execute(f"""
+        SELECT shadow_model,
+               COUNT(*)                  AS samples,
+               AVG(agree)                AS agreement_rate,
+               AVG(confidence_delta)     AS mean_confidence_delta,
+               AVG(ABS(confidence_delta)) AS mean_abs_confidence_delta,
+               AVG(live_preprocess_ms)   AS live_preprocess_ms,
+               AVG(live_classify_ms)     AS live_classify_ms,
+               AVG(shadow_preprocess_ms) AS shadow_preprocess_ms,
+               AVG(shadow_classify_ms)   AS shadow_classify_ms,
+               MIN(timestamp)            AS first_seen,
+               MAX(timestamp)            AS last_seen
+        FROM shadow_predictions
+        {where}
+        GROUP BY shadow_model
+        ORDER BY last_seen DESC
+    """, (shadow_model,) if shadow_model else ())
+    rows = [dict(r) for r in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
 def get_history():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
@@ -88,3 +440,84 @@ def get_history():
     rows = [dict(r) for r in cursor.fetchall()]
     conn.close()
     return rows
+
+
+def _fts_query(text: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every term is quoted so operators
+    and punctuation in exception strings are matched literally, and a
+    trailing `*` on a term keeps it as a prefix query.
+    """
+    terms = []
+    for token in text.split():
+        prefix = token.endswith("*")
+        words = re.findall(r"\w+", token)
+        for i, word in enumerate(words):
+            quoted = f'"{word}"'
+            if prefix and i == len(words) - 1:
+                quoted += "*"
+            terms.append(quoted)
+    return " ".join(terms)
+
+
+def search_history(query: str, limit: int = 50, offset: int = 0):
+    """
+    Ranked full-text search over error_message, error_category and
+    root_cause. Returns (rows, has_more); rows are ordered best match first.
+
+    Ranking is limited to the newest _SEARCH_RANK_CANDIDATES matches: FTS5
+    walks the matches newest-first and stops there, so only those rows get
+    a bm25 score. Older matches of a broad term are not reachable by paging;
+    narrow the query to find them.
+    """
+    match = _fts_query(query)
+    if not match:
+        return [], False
+
+    limit = max(1, min(int(limit), _SEARCH_MAX_LIMIT))
+    offset = max(0, int(offset))
+
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    # Rank a bounded set of candidates, page through them, then join only
+    # the rows being returned
+    cursor.execute("""
+        SELECT p.id, p.error_message, p.user_count, p.predicted_severity,
+               p.confidence, p.impact_score, p.error_category, p.root_cause,
+               p.suggested_fix, p.timestamp, hits.score
+        FROM (
+            SELECT rowid, score
+            FROM (
+                SELECT rowid, bm25(predictions_fts) AS score
+                FROM predictions_fts
+                WHERE predictions_fts MATCH ?
+                ORDER BY rowid DESC
+                LIMIT ?
+            )
+            ORDER BY score, rowid DESC
+            LIMIT ? OFFSET ?
+        ) AS hits
+        JOIN predictions AS p ON p.id = hits.rowid
+        ORDER BY hits.score, p.id DESC
+    """, (match, _SEARCH_RANK_CANDIDATES, limit + 1, offset))
+    rows = [dict(r) for r in cursor.fetchall()]
+    conn.close()
+    return rows[:limit], len(rows) > limit
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Predictions DB maintenance.")
+    parser.add_argument(
+        "command", choices=["backfill-search"],
+        help="backfill-search: index rows that predate the full-text index",
+    )
+    parser.add_argument("--batch-size", type=int, default=_FTS_BACKFILL_BATCH)
+    args = parser.parse_args()
+
+    if args.command == "backfill-search":
+        init_db(background_backfill=False)
+        count = backfill_search_index(args.batch_size, verbose=True)
+        print(f"✅ Indexed {count:,} rows")
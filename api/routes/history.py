@@ -1,5 +1,5 @@
-from flask import Blueprint, jsonify
-from db.database import get_history
+from flask import Blueprint, request, jsonify
+from db.database import get_history, search_history
 
 history_bp = Blueprint("history", __name__)
 
@@ -7,3 +7,25 @@ history_bp = Blueprint("history", __name__)
 def history_route():
     records = get_history()
     return jsonify(records)
+
+
+@history_bp.route("/history/search", methods=["GET"])
+def history_search_route():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+
+    try:
+        limit = int(request.args.get("limit", 50))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+
+    records, has_more = search_history(query, limit=limit, offset=offset)
+    return jsonify({
+        "query": query,
+        "offset": offset,
+        "count": len(records),
+        "has_more": has_more,
+        "results": records,
+    })
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
-from services.model_service import predict
+from services.model_service import predict_timed
 from services.root_cause_engine import analyze_error
+from services.admission import admission_control
+from services.shadow_service import submit_shadow
 from db.database import save_prediction
 import datetime
 
@@ -8,6 +10,7 @@ predict_bp = Blueprint("predict", __name__)
 
 
 @predict_bp.route("/predict", methods=["POST"])
+@admission_control
 def predict_route():
     from extensions import socketio
 
@@ -19,7 +22,7 @@ def predict_route():
         return jsonify({"error": "error_message is required"}), 400
 
     # ML severity prediction
-    result = predict(error_message, user_count)
+    result, timings = predict_timed(error_message, user_count)
 
     # Rule-based root cause analysis
     analysis = analyze_error(error_message)
@@ -36,6 +39,9 @@ def predict_route():
         suggested_fix=analysis["suggested_fix"],
     )
 
+    # Compare a sample against the candidate model, off the request path
+    submit_shadow(error_message, user_count, result, timings, prediction_id)
+
     # Broadcast for Live Monitoring
     live_event = {
         "id": prediction_id,
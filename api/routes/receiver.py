@@ -1,12 +1,15 @@
 from flask import Blueprint, request, jsonify
-from services.model_service import predict
+from services.model_service import predict_timed
 from services.root_cause_engine import analyze_error
+from services.admission import admission_control
+from services.shadow_service import submit_shadow
 from db.database import save_prediction
 import datetime
 
 receiver_bp = Blueprint("receiver", __name__)
 
 @receiver_bp.route("/api/v1/receive", methods=["POST"])
+@admission_control
 def receive_event():
     """
     Endpoint for external applications to send live error data.
@@ -23,7 +26,7 @@ def receive_event():
         return jsonify({"status": "error", "message": "error_message is required"}), 400
 
     # ML severity prediction
-    result = predict(error_message, user_count)
+    result, timings = predict_timed(error_message, user_count)
 
     # Rule-based root cause analysis
     analysis = analyze_error(error_message)
@@ -40,6 +43,9 @@ def receive_event():
         suggested_fix=analysis["suggested_fix"],
     )
 
+    # Compare a sample against the candidate model, off the request path
+    submit_shadow(error_message, user_count, result, timings, prediction_id)
+
     # Broadcast to all clients for "Live Monitoring"
     live_event = {
         "id": prediction_id,
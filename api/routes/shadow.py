@@ -0,0 +1,10 @@
+from flask import Blueprint, request, jsonify
+from db.database import get_shadow_summary
+
+shadow_bp = Blueprint("shadow", __name__)
+
+
+@shadow_bp.route("/shadow-status", methods=["GET"])
+def shadow_status_route():
+    summary = get_shadow_summary(request.args.get("model"))
+    return jsonify(summary)
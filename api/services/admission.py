@@ -0,0 +1,256 @@
+"""
+Admission Control
+-----------------
+Protects the ingest endpoints (``/predict`` and ``/api/v1/receive``) from
+clients that flood them. Every admitted request runs the model, writes to
+the DB and broadcasts over Socket.IO, so overload is shed before any of
+that work starts.
+
+Strategy:
+  - Token bucket per ``app_source`` and, when an ``X-API-Key`` header is
+    sent, per API key. An empty bucket is answered with 429 + Retry-After.
+    Sources on the same host never share a bucket, so one flooding source
+    cannot starve a well-behaved neighbour.
+  - ``app_source`` is chosen by the client, so each address may only use
+    ``_MAX_SOURCES_PER_ADDR`` distinct sources at a time. Any further
+    sources from that address share a single overflow bucket, which stops
+    a flooder that invents a new source for every request.
+  - Global cap on in-flight ingest requests. Requests over the cap are shed
+    immediately with 503 instead of queueing behind the flood.
+  - Two priority lanes, decided before any limit is charged: events
+    affecting at least ``_PRIORITY_USER_COUNT`` users are charged to a
+    separate per-source priority bucket, so a source that is over its
+    normal limit can still report them. They may also use the
+    ``_PRIORITY_RESERVED`` in-flight slots that normal events cannot.
+
+State is held per process. Each bucket carries its own small lock, so
+sources never contend with each other. Each registry is a bounded LRU that
+evicts its least recently used entry, so rotating keys cannot grow memory.
+Its lock, like the in-flight gauge's, is held for O(1) amortised work per
+request.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# Per-source token bucket: sustained rate (req/s) and burst size
+_SOURCE_RATE = 20.0
+_SOURCE_BURST = 40
+# Per-source bucket for priority events, separate from the normal one
+_PRIORITY_RATE = 10.0
+_PRIORITY_BURST = 20
+# Distinct sources one address may use within the window before the rest
+# share an overflow bucket
+_MAX_SOURCES_PER_ADDR = 8
+_SOURCE_WINDOW_SECONDS = 60.0
+# Per-API-key token bucket
+_KEY_RATE = 50.0
+_KEY_BURST = 100
+# Maximum ingest requests being processed at once
+_MAX_IN_FLIGHT = 16
+# Slots only the priority lane may use
+_PRIORITY_RESERVED = 4
+# Events affecting at least this many users go in the priority lane
+_PRIORITY_USER_COUNT = 100
+# Entries tracked per registry; the least recently used one is evicted
+_MAX_BUCKETS = 10_000
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """Classic token bucket refilled lazily on each call."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "_lock")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, now: float) -> float:
+        """
+        Consume one token. Returns 0.0 on success, otherwise the number of
+        seconds until a token will be available.
+        """
+        with self._lock:
+            elapsed = now - self.updated
+            if elapsed > 0:
+                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                self.updated = now
+            if self.tokens >= 1.0 - 1e-9:
+                self.tokens = max(0.0, self.tokens - 1.0)
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+
+class _BucketRegistry:
+    """Bounded LRU of token buckets, created lazily per key."""
+
+    def __init__(self, rate: float, capacity: int, max_size: int = _MAX_BUCKETS):
+        self._rate = rate
+        self._capacity = capacity
+        self._max_size = max_size
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                self._buckets.move_to_end(key)
+                return bucket
+            bucket = TokenBucket(self._rate, self._capacity)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self._max_size:
+                self._buckets.popitem(last=False)
+            return bucket
+
+
+class _SourceTracker:
+    """
+    Recently used sources per client address (bounded LRU of addresses).
+    Maps a claimed ``app_source`` to the bucket key it is charged to.
+    """
+
+    def __init__(self, max_sources: int = _MAX_SOURCES_PER_ADDR,
+                 window: float = _SOURCE_WINDOW_SECONDS,
+                 max_addrs: int = _MAX_BUCKETS):
+        self._max_sources = max_sources
+        self._window = window
+        self._max_addrs = max_addrs
+        self._addrs: OrderedDict[str, OrderedDict[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket_key(self, remote_addr: str, app_source: str, now: float) -> str:
+        with self._lock:
+            sources = self._addrs.get(remote_addr)
+            if sources is None:
+                sources = self._addrs[remote_addr] = OrderedDict()
+                if len(self._addrs) > self._max_addrs:
+                    self._addrs.popitem(last=False)
+            else:
+                self._addrs.move_to_end(remote_addr)
+
+            if app_source in sources:
+                sources[app_source] = now
+                sources.move_to_end(app_source)
+                return app_source
+
+            # Forget sources this address has not used within the window
+            cutoff = now - self._window
+            while sources and next(iter(sources.values())) < cutoff:
+                sources.popitem(last=False)
+
+            if len(sources) < self._max_sources:
+                sources[app_source] = now
+                return app_source
+            return f"{remote_addr}#overflow"
+
+
+class _ConcurrencyGate:
+    """In-flight counter with a reserved share for the priority lane."""
+
+    def __init__(self, limit: int, reserved: int):
+        self._limit = limit
+        self._normal_limit = max(1, limit - reserved)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_enter(self, priority: bool) -> bool:
+        limit = self._limit if priority else self._normal_limit
+        with self._lock:
+            if self._in_flight >= limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+
+_sources = _SourceTracker()
+_source_buckets = _BucketRegistry(_SOURCE_RATE, _SOURCE_BURST)
+_priority_buckets = _BucketRegistry(_PRIORITY_RATE, _PRIORITY_BURST)
+_key_buckets = _BucketRegistry(_KEY_RATE, _KEY_BURST)
+_gate = _ConcurrencyGate(_MAX_IN_FLIGHT, _PRIORITY_RESERVED)
+
+
+def _user_count(data: dict) -> int:
+    try:
+        return int(data.get("user_count", 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _rejection(status: int, message: str, retry_after: float):
+    from flask import jsonify
+
+    response = jsonify({"status": "error", "error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def check_rate_limits(remote_addr: str, app_source: str, api_key: str | None,
+                      priority: bool = False) -> float:
+    """
+    Charge one request to its source bucket (the priority bucket for
+    priority events) and key bucket. Returns 0.0 when the request is
+    allowed, otherwise the suggested Retry-After in seconds.
+    """
+    now = time.monotonic()
+    key = _sources.bucket_key(remote_addr, app_source, now)
+    buckets = _priority_buckets if priority else _source_buckets
+    wait = buckets.get(key).take(now)
+    if wait:
+        return wait
+    if api_key:
+        return _key_buckets.get(api_key).take(now)
+    return 0.0
+
+
+def admission_control(view):
+    """
+    Route decorator that applies rate limits and the concurrency cap before
+    the wrapped ingest view runs.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import request
+
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict):
+            data = {}
+        remote_addr = request.remote_addr or "unknown"
+        app_source = str(data.get("app_source") or remote_addr)
+        api_key = request.headers.get("X-API-Key")
+
+        priority = _user_count(data) >= _PRIORITY_USER_COUNT
+        retry_after = check_rate_limits(remote_addr, app_source, api_key, priority)
+        if retry_after:
+            return _rejection(429, "rate limit exceeded", retry_after)
+
+        if not _gate.try_enter(priority):
+            return _rejection(503, "server overloaded, retry later", 1)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _gate.leave()
+
+    return wrapper
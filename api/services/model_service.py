@@ -1,11 +1,14 @@
 import joblib
 import os
 import math
+import time
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "model", "model.pkl")
 
 _model = None
 
+_SEVERITY_WEIGHT = {"High": 3, "Medium": 2, "Low": 1}
+
 def load_model():
     global _model
     if _model is None:
@@ -13,17 +16,57 @@ def load_model():
     return _model
 
 def predict(error_message: str, user_count: int) -> dict:
-    model = load_model()
+    return predict_timed(error_message, user_count)[0]
+
+def predict_timed(error_message: str, user_count: int, model=None) -> tuple[dict, dict]:
+    """
+    predict() that also reports how long each pipeline stage took:
+    ({severity, confidence, impact_score}, {preprocess_ms, classify_ms}).
+    Scores with the live model unless another fitted pipeline is given.
+    """
+    model = model if model is not None else load_model()
     import pandas as pd
     X = pd.DataFrame([{"error_message": error_message, "user_count": user_count}])
-    severity = model.predict(X)[0]
-    confidence = float(model.predict_proba(X).max())
+    t0 = time.perf_counter()
+    features = model.named_steps["preprocessor"].transform(X)
+    t1 = time.perf_counter()
+    proba = model.named_steps["classifier"].predict_proba(features)[0]
+    t2 = time.perf_counter()
+    best = int(proba.argmax())
+    severity = model.classes_[best]
+    confidence = float(proba[best])
     impact_score = compute_impact_score(severity, confidence, user_count)
-    return {
+    result = {
         "severity": severity,
         "confidence": confidence,
         "impact_score": impact_score,
     }
+    timings = {
+        "preprocess_ms": (t1 - t0) * 1000,
+        "classify_ms": (t2 - t1) * 1000,
+    }
+    return result, timings
+
+def predict_batch(error_messages: list[str], user_counts: list[int]) -> dict:
+    """
+    Vectorised form of predict() for many rows at once. Returns parallel
+    lists under the same keys: severity, confidence, impact_score.
+    """
+    model = load_model()
+    import numpy as np
+    import pandas as pd
+    X = pd.DataFrame({"error_message": error_messages, "user_count": user_counts})
+    proba = model.predict_proba(X)
+    best = proba.argmax(axis=1)
+    severity = model.classes_[best]
+    confidence = proba[np.arange(len(best)), best]
+    weight = np.array([_SEVERITY_WEIGHT.get(s, 1) for s in model.classes_])[best]
+    impact = np.round(weight * confidence * np.log1p(np.asarray(user_counts, dtype=float)), 4)
+    return {
+        "severity": severity.tolist(),
+        "confidence": confidence.astype(float).tolist(),
+        "impact_score": impact.tolist(),
+    }
 
 def compute_impact_score(severity: str, confidence: float, user_count: int) -> float:
     """
@@ -31,6 +74,5 @@ def compute_impact_score(severity: str, confidence: float, user_count: int) -> f
         impact = severity_weight * confidence * log1p(user_count)
     severity_weight: High=3, Medium=2, Low=1
     """
-    weight = {"High": 3, "Medium": 2, "Low": 1}
-    w = weight.get(severity, 1)
+    w = _SEVERITY_WEIGHT.get(severity, 1)
     return round(w * confidence * math.log1p(user_count), 4)
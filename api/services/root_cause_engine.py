@@ -3,10 +3,18 @@ Root Cause Engine
 -----------------
 Categorises an error message using keyword matching and returns a structured
 dict with: category, root_cause, suggested_fix.
+
+Messages that match no keyword fall back to the semantic index
+(see ``semantic_index``), which compares them with previously classified
+messages in the severity model's TF-IDF space.
 """
 
 from __future__ import annotations
 
+import re
+
+from services import semantic_index
+
 # ---------------------------------------------------------------------------
 # Category rules: ordered list of (keywords, metadata) tuples.
 # The FIRST matching rule wins.
@@ -173,6 +181,15 @@ _RULES: list[tuple[list[str], dict]] = [
     ),
 ]
 
+_RULES_BY_CATEGORY: dict[str, dict] = {meta["category"]: meta for _, meta in _RULES}
+
+# One alternation per rule, in rule order: a message is scanned once per
+# rule rather than once per keyword
+_RULE_PATTERNS: list[tuple[re.Pattern, dict]] = [
+    (re.compile("|".join(re.escape(kw) for kw in keywords)), meta)
+    for keywords, meta in _RULES
+]
+
 _DEFAULT: dict = {
     "category": "General Application Error",
     "root_cause": (
@@ -189,6 +206,33 @@ _DEFAULT: dict = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _match_rule(lower: str) -> dict | None:
+    """Return the metadata of the first keyword rule matching *lower*."""
+    for pattern, meta in _RULE_PATTERNS:
+        if pattern.search(lower):
+            return meta
+    return None
+
+
+def _result(meta: dict | None) -> dict:
+    """Build the public result dict for a rule (or the default)."""
+    if meta is None:
+        return dict(_DEFAULT)
+    return {
+        "category": meta["category"],
+        "root_cause": meta["root_cause"],
+        "suggested_fix": meta["suggested_fix"],
+    }
+
+
+def _semantic_meta(match: tuple[str, float] | None) -> dict | None:
+    return _RULES_BY_CATEGORY.get(match[0]) if match is not None else None
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -198,14 +242,33 @@ def analyze_error(error_message: str) -> dict:
     Analyse *error_message* and return a dict with keys:
         category, root_cause, suggested_fix
     """
-    lower = error_message.lower()
+    meta = _match_rule(error_message.lower())
+    if meta is not None:
+        semantic_index.add_exemplar(error_message, meta["category"])
+        return _result(meta)
+
+    # Second stage: nearest labelled exemplars in TF-IDF space
+    return _result(_semantic_meta(semantic_index.semantic_match(error_message)))
+
+
+def analyze_errors(error_messages: list[str]) -> list[dict]:
+    """
+    Batch form of analyze_error(). Keyword rules run once per distinct
+    message; every message they miss is sent to the semantic index in a
+    single call.
+
+    Unlike analyze_error(), this never teaches the index: each message is
+    classified against the index as it stands, so results do not depend on
+    how messages are grouped into batches or in which order batches run.
+    """
+    # Archived logs repeat the same messages heavily; classify each
+    # distinct message once
+    metas = {m: _match_rule(m.lower()) for m in dict.fromkeys(error_messages)}
+    unmatched = [m for m, meta in metas.items() if meta is None]
 
-    for keywords, meta in _RULES:
-        if any(kw in lower for kw in keywords):
-            return {
-                "category": meta["category"],
-                "root_cause": meta["root_cause"],
-                "suggested_fix": meta["suggested_fix"],
-            }
+    index = semantic_index.get_index()
+    if index is not None and unmatched:
+        for m, match in zip(unmatched, index.classify_many(unmatched)):
+            metas[m] = _semantic_meta(match)
 
-    return dict(_DEFAULT)
+    return [_result(metas[m]) for m in error_messages]
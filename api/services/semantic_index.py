@@ -0,0 +1,389 @@
+"""
+Semantic Index
+--------------
+Second-stage root cause classifier used when no keyword rule matches.
+
+Error messages are projected into the TF-IDF space of the trained severity
+model (``model.pkl``) and compared against an index of labelled exemplar
+messages with cosine similarity.
+
+Strategy:
+  - Seed the index once at load with the keywords of every rule in
+    ``root_cause_engine._RULES``, labelled with the rule's category.
+  - Grow it incrementally with messages that a keyword rule classified.
+    Requests only enqueue them; a learner thread vectorises and adds them
+    in batches. Past ``_MAX_EXEMPLARS`` the oldest learned exemplars are
+    evicted first (the seeds are pinned).
+  - Keep the exemplars as an inverted (term x exemplar) CSR matrix, so a
+    query only touches the columns of the terms it actually contains.
+    TF-IDF rows are already L2-normalised, so a dot product is the cosine.
+  - New exemplars land in a small pending block that is scanned directly
+    and merged into the inverted matrix by the learner thread once it
+    grows past ``_MERGE_THRESHOLD`` rows, so requests never pay for it.
+  - Score a whole batch of messages with one sparse matrix product and take
+    a similarity-weighted vote over the top-k neighbours.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Neighbours that take part in the vote
+_TOP_K = 5
+# Best neighbour must be at least this similar for the vote to count
+_MIN_SIMILARITY = 0.35
+# Pending exemplars are merged into the inverted matrix past this size
+_MERGE_THRESHOLD = 1024
+# Exemplars held in memory; past this the oldest learned ones are evicted
+_MAX_EXEMPLARS = 100_000
+# Rule-classified messages waiting for the learner thread; extras are dropped
+_LEARN_QUEUE_SIZE = 10_000
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _load_vectorizer():
+    """Return the fitted TfidfVectorizer from the severity model pipeline."""
+    from services.model_service import load_model
+
+    pipeline = load_model()
+    return pipeline.named_steps["preprocessor"].named_transformers_["tfidf"]
+
+
+def _fast_tfidf(vectorizer):
+    """
+    (analyzer, vocabulary, idf) when *vectorizer* uses the default raw-count
+    tf, idf weighting and l2 norm, so SemanticIndex can vectorise without
+    transform(); None for any other configuration.
+    """
+    if (getattr(vectorizer, "norm", None) != "l2"
+            or not getattr(vectorizer, "use_idf", False)
+            or getattr(vectorizer, "sublinear_tf", False)
+            or getattr(vectorizer, "binary", False)):
+        return None
+    return vectorizer.build_analyzer(), vectorizer.vocabulary_, vectorizer.idf_
+
+
+def _seed_exemplars() -> list[tuple[str, str]]:
+    """(text, category) pairs built from the keyword rules."""
+    from services.root_cause_engine import _RULES
+
+    return [
+        (kw, meta["category"])
+        for keywords, meta in _RULES
+        for kw in keywords
+    ]
+
+
+class SemanticIndex:
+    """Sparse cosine-similarity index of labelled exemplar messages."""
+
+    def __init__(self, vectorizer, top_k: int = _TOP_K,
+                 min_similarity: float = _MIN_SIMILARITY,
+                 max_exemplars: int = _MAX_EXEMPLARS):
+        self._vectorizer = vectorizer
+        self._top_k = top_k
+        self._min_similarity = min_similarity
+        self._max_exemplars = max_exemplars
+        self._fast = _fast_tfidf(vectorizer)
+        self._lock = threading.Lock()        # guards the snapshot readers see
+        self._write_lock = threading.Lock()  # serialises writers
+
+        self._categories: list[str] = []           # category name per code
+        self._category_codes: dict[str, int] = {}
+        self._labels = np.empty(0, dtype=np.int32)  # category code per exemplar
+        # Keys of the live exemplars in column order (merged, then pending);
+        # _seen mirrors it, so both shrink when exemplars are evicted
+        self._keys: list[str] = []
+        self._seen: set[str] = set()
+        # The first _pinned exemplars (the seeds) are never evicted
+        self._pinned = 0
+
+        self._inverted = None   # CSR (n_terms x n_merged)
+        self._pending = None    # CSR (n_pending x n_terms)
+        self._pending_labels: list[int] = []
+
+    # ── Building ─────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._labels) + len(self._pending_labels)
+
+    def _vectorize(self, texts: list[str]):
+        """
+        TfidfVectorizer.transform() equivalent. For the default l2/idf
+        configuration it looks terms up directly, skipping the per-call
+        overhead of transform(), which dominates for a single message.
+        """
+        from scipy import sparse
+
+        if self._fast is None:
+            return self._vectorizer.transform(texts).tocsr()
+
+        analyzer, vocabulary, idf = self._fast
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            counts: dict[int, int] = {}
+            for token in analyzer(text):
+                j = vocabulary.get(token)
+                if j is not None:
+                    counts[j] = counts.get(j, 0) + 1
+            for j in sorted(counts):
+                indices.append(j)
+                data.append(counts[j])
+            indptr.append(len(indices))
+
+        indices = np.asarray(indices, dtype=np.int32)
+        data = np.asarray(data, dtype=np.float64) * idf[indices]
+        indptr = np.asarray(indptr, dtype=np.int32)
+        if data.size:
+            row_of = np.repeat(np.arange(len(texts)), np.diff(indptr))
+            norms = np.sqrt(np.bincount(row_of, weights=data * data,
+                                        minlength=len(texts)))
+            data /= norms[row_of]
+        return sparse.csr_matrix(
+            (data, indices, indptr), shape=(len(texts), len(vocabulary))
+        )
+
+    def add_many(self, exemplars: list[tuple[str, str]]) -> int:
+        """
+        Vectorise and add (text, category) pairs. Returns number added.
+        Runs on the caller's thread; request handlers go through
+        add_exemplar(), which hands the work to the learner thread.
+        """
+        from scipy import sparse
+
+        with self._write_lock:
+            fresh, batch = [], set()
+            for text, category in exemplars:
+                key = text.strip().lower()
+                if not key or key in self._seen or key in batch:
+                    continue
+                batch.add(key)
+                fresh.append((key, category))
+            if not fresh:
+                return 0
+
+            X = self._vectorize([text for text, _ in fresh])
+            keep = np.flatnonzero(np.diff(X.indptr) > 0)
+            if keep.size == 0:
+                return 0
+            X = X[keep]
+            # Only keys that made it into the index are remembered
+            kept_keys = [fresh[i][0] for i in keep]
+            codes = [self._code(fresh[i][1]) for i in keep]
+            if self._pending is not None:
+                X = sparse.vstack([self._pending, X], format="csr")
+
+            with self._lock:
+                self._pending = X
+                self._pending_labels = self._pending_labels + codes
+                self._keys.extend(kept_keys)
+                self._seen.update(kept_keys)
+
+            if (len(self._pending_labels) >= _MERGE_THRESHOLD
+                    or len(self) > self._max_exemplars):
+                self._merge()
+            return len(kept_keys)
+
+    def pin(self) -> None:
+        """Merge everything added so far and protect it from eviction."""
+        with self._write_lock:
+            self._merge()
+            self._pinned = len(self._labels)
+
+    def _code(self, category: str) -> int:
+        code = self._category_codes.get(category)
+        if code is None:
+            code = len(self._categories)
+            self._categories.append(category)
+            self._category_codes[category] = code
+        return code
+
+    def _merge(self) -> None:
+        """
+        Fold the pending block into the inverted matrix, evicting the oldest
+        unpinned exemplars beyond the size cap (write lock held). The
+        rebuild runs outside the read lock; readers keep using the previous
+        snapshot until the swap.
+        """
+        from scipy import sparse
+
+        if self._pending is None:
+            return
+        rows = self._pending
+        if self._inverted is not None:
+            rows = sparse.vstack([self._inverted.T, rows], format="csr")
+        labels = np.concatenate(
+            [self._labels, np.asarray(self._pending_labels, dtype=np.int32)]
+        )
+        keys = self._keys
+
+        excess = min(max(0, len(labels) - self._max_exemplars),
+                     len(labels) - self._pinned)
+        evicted: list[str] = []
+        if excess:
+            lo, hi = self._pinned, self._pinned + excess
+            rows = (sparse.vstack([rows[:lo], rows[hi:]], format="csr")
+                    if lo else rows[hi:])
+            labels = np.concatenate([labels[:lo], labels[hi:]])
+            evicted = keys[lo:hi]
+            keys = keys[:lo] + keys[hi:]
+        inverted = rows.T.tocsr()
+
+        with self._lock:
+            self._inverted = inverted
+            self._labels = labels
+            self._pending = None
+            self._pending_labels = []
+            self._keys = keys
+            self._seen.difference_update(evicted)
+
+    # ── Querying ─────────────────────────────────────────────────────────
+
+    def classify_many(self, messages: list[str]) -> list[tuple[str, float] | None]:
+        """
+        Return one (category, similarity) per message, or None when no
+        exemplar is similar enough.
+        """
+        from scipy import sparse
+
+        if not messages:
+            return []
+
+        Q = self._vectorize(messages)
+
+        with self._lock:
+            inverted = self._inverted
+            labels = self._labels
+            pending = self._pending
+            pending_labels = np.asarray(self._pending_labels, dtype=np.int32)
+            categories = list(self._categories)
+
+        # One product per block: (n_queries x n_terms) @ (n_terms x n_exemplars)
+        parts, part_labels = [], []
+        if inverted is not None:
+            parts.append((Q @ inverted).tocsr())
+            part_labels.append(labels)
+        if pending is not None:
+            parts.append((Q @ pending.T).tocsr())
+            part_labels.append(pending_labels)
+        if not parts:
+            return [None] * len(messages)
+
+        S = sparse.hstack(parts, format="csr") if len(parts) > 1 else parts[0]
+        all_labels = np.concatenate(part_labels)
+
+        # Rank every row's similarities at once: sort by (row, -score), then
+        # each entry's rank is its offset from the start of its row
+        n = S.shape[0]
+        counts = np.diff(S.indptr)
+        rows = np.repeat(np.arange(n), counts)
+        order = np.lexsort((-S.data, rows))
+        rank = np.arange(order.size) - np.repeat(S.indptr[:-1], counts)
+        top = order[rank < self._top_k]
+
+        has_match = counts > 0
+        best = np.zeros(n)
+        best[has_match] = S.data[order[S.indptr[:-1][has_match]]]
+
+        # Similarity-weighted votes of each row's top-k, as one bincount
+        n_categories = len(categories)
+        votes = np.bincount(
+            rows[top] * n_categories + all_labels[S.indices[top]],
+            weights=S.data[top],
+            minlength=n * n_categories,
+        ).reshape(n, n_categories)
+        winners = votes.argmax(axis=1)
+        accepted = has_match & (best >= self._min_similarity)
+
+        return [
+            (categories[winner], round(float(score), 4)) if ok else None
+            for winner, score, ok in zip(winners.tolist(), best.tolist(), accepted.tolist())
+        ]
+
+    def classify(self, message: str) -> tuple[str, float] | None:
+        return self.classify_many([message])[0]
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+_index: SemanticIndex | None = None
+_index_failed = False
+_index_lock = threading.Lock()
+_learn_queue: queue.Queue = queue.Queue(maxsize=_LEARN_QUEUE_SIZE)
+_learner: threading.Thread | None = None
+
+
+def _learn() -> None:
+    """Learner thread: add queued rule-classified messages in batches."""
+    while True:
+        batch = [_learn_queue.get()]
+        while len(batch) < _MERGE_THRESHOLD:
+            try:
+                batch.append(_learn_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _index.add_many(batch)
+        except Exception:
+            logger.exception("Could not add %d exemplars to the semantic index", len(batch))
+
+
+def get_index() -> SemanticIndex | None:
+    """
+    Build the index on first use. Returns None if the model has not been
+    trained yet, in which case callers should skip the semantic stage.
+    """
+    global _index, _index_failed
+    if _index is not None or _index_failed:
+        return _index
+    with _index_lock:
+        if _index is None and not _index_failed:
+            try:
+                index = SemanticIndex(_load_vectorizer())
+                index.add_many(_seed_exemplars())
+                index.pin()
+                _index = index
+            except Exception:
+                _index_failed = True
+    return _index
+
+
+def semantic_match(error_message: str) -> tuple[str, float] | None:
+    """Return (category, similarity) for the closest exemplars, or None."""
+    index = get_index()
+    if index is None:
+        return None
+    return index.classify(error_message)
+
+
+def add_exemplar(error_message: str, category: str) -> None:
+    """
+    Record a rule-classified message so later look-alikes can match it.
+    Only enqueues: vectorising and indexing happen on the learner thread,
+    and messages are dropped while its queue is full.
+    """
+    global _learner
+    if get_index() is None:
+        return
+    if _learner is None:
+        with _index_lock:
+            if _learner is None:
+                _learner = threading.Thread(
+                    target=_learn, name="semantic-index-learner", daemon=True
+                )
+                _learner.start()
+    try:
+        _learn_queue.put_nowait((error_message, category))
+    except queue.Full:
+        pass
@@ -0,0 +1,174 @@
+"""
+Shadow Service
+--------------
+Runs a candidate model (e.g. freshly produced by ``model/train.py``) next to
+the live model on real traffic, without touching request latency.
+
+Strategy:
+  - The ingest routes hand a sampled fraction of their live predictions to
+    ``submit_shadow()``, which only does a random draw and a non-blocking
+    queue put. When the queue is full the sample is dropped.
+  - The live model's stage latencies are measured on the request itself
+    (``predict_timed``), so the live model is never run a second time.
+  - A single daemon thread drains the queue, scores each event with the
+    shadow model only (timing its preprocessing and classifier stages) and
+    writes the comparisons to the ``shadow_predictions`` table in batches.
+  - Shadow mode is off unless a candidate model file exists at
+    ``SHADOW_MODEL_PATH``; it is loaded by the worker thread, never by a
+    request.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from services.model_service import predict_timed
+from db.database import save_shadow_predictions
+
+logger = logging.getLogger(__name__)
+
+SHADOW_MODEL_PATH = os.environ.get(
+    "SHADOW_MODEL_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "model", "shadow_model.pkl"),
+)
+
+# Fraction of live predictions that are replayed against the shadow model
+_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+# Samples waiting for the worker; extra samples are dropped, never awaited
+_QUEUE_SIZE = 1000
+# Evaluations written per DB transaction
+_WRITE_BATCH = 50
+# After the first failure (logged with a traceback), log every Nth one
+_ERROR_LOG_EVERY = 100
+
+_queue: queue.Queue = queue.Queue(maxsize=_QUEUE_SIZE)
+_enabled = False
+_worker: threading.Thread | None = None
+_start_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _evaluate(shadow_model, shadow_name: str, event: dict) -> dict:
+    """Score one sampled event with the shadow model and build its record."""
+    shadow, timings = predict_timed(
+        event["error_message"], event["user_count"], model=shadow_model
+    )
+    shadow_severity = str(shadow["severity"])
+    return {
+        "prediction_id": event["prediction_id"],
+        "shadow_model": shadow_name,
+        "user_count": event["user_count"],
+        "live_severity": event["live_severity"],
+        "live_confidence": round(event["live_confidence"], 4),
+        "shadow_severity": shadow_severity,
+        "shadow_confidence": round(shadow["confidence"], 4),
+        "agree": int(shadow_severity == event["live_severity"]),
+        "confidence_delta": round(shadow["confidence"] - event["live_confidence"], 4),
+        "live_preprocess_ms": event["live_preprocess_ms"],
+        "live_classify_ms": event["live_classify_ms"],
+        "shadow_preprocess_ms": round(timings["preprocess_ms"], 3),
+        "shadow_classify_ms": round(timings["classify_ms"], 3),
+    }
+
+
+def _run() -> None:
+    global _enabled
+    import joblib
+
+    try:
+        shadow_model = joblib.load(SHADOW_MODEL_PATH)
+    except Exception:
+        logger.exception("Shadow mode disabled: could not load %s", SHADOW_MODEL_PATH)
+        _enabled = False
+        return
+
+    # Identify the candidate by file name + mtime so retrains show up separately
+    mtime = time.strftime(
+        "%Y-%m-%d %H:%M:%S", time.gmtime(os.path.getmtime(SHADOW_MODEL_PATH))
+    )
+    shadow_name = f"{os.path.basename(SHADOW_MODEL_PATH)}@{mtime}"
+    logger.info("Shadow mode enabled for %s (sample rate %.2f)", shadow_name, _SAMPLE_RATE)
+
+    failures = 0
+    while True:
+        events = [_queue.get()]
+        while len(events) < _WRITE_BATCH:
+            try:
+                events.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        records = []
+        for event in events:
+            try:
+                records.append(_evaluate(shadow_model, shadow_name, event))
+            except Exception:
+                # a bad sample must never stop the shadow worker
+                failures += 1
+                if failures == 1:
+                    logger.exception("Shadow evaluation failed")
+                elif failures % _ERROR_LOG_EVERY == 0:
+                    logger.warning("Shadow evaluation has failed %d times", failures)
+
+        try:
+            if records:
+                save_shadow_predictions(records)
+        except Exception:
+            logger.exception("Could not store %d shadow evaluations", len(records))
+        finally:
+            for _ in events:
+                _queue.task_done()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def start_shadow_worker() -> bool:
+    """Start the background worker if a shadow model is present."""
+    global _enabled, _worker
+    with _start_lock:
+        if _worker is not None:
+            return _enabled
+        if not os.path.exists(SHADOW_MODEL_PATH) or _SAMPLE_RATE <= 0:
+            return False
+        _enabled = True
+        _worker = threading.Thread(target=_run, name="shadow-model", daemon=True)
+        _worker.start()
+    return True
+
+
+def submit_shadow(
+    error_message: str,
+    user_count: int,
+    live_result: dict,
+    live_timings: dict,
+    prediction_id: int | None = None,
+) -> None:
+    """
+    Queue a sampled live prediction for shadow evaluation. *live_timings*
+    are the stage latencies returned by predict_timed(). Cheap and
+    non-blocking: safe to call on the request path.
+    """
+    if not _enabled or random.random() >= _SAMPLE_RATE:
+        return
+    try:
+        _queue.put_nowait({
+            "prediction_id": prediction_id,
+            "error_message": error_message,
+            "user_count": user_count,
+            "live_severity": str(live_result["severity"]),
+            "live_confidence": float(live_result["confidence"]),
+            "live_preprocess_ms": round(live_timings["preprocess_ms"], 3),
+            "live_classify_ms": round(live_timings["classify_ms"], 3),
+        })
+    except queue.Full:
+        pass
@@ -12,7 +12,7 @@ export default function BugDetailModal({ bug, onClose }) {
           <span className={`badge badge-${bug.predicted_severity.toLowerCase()}`}>
             {bug.predicted_severity} Severity
           </span>
-          <span className="modal-time">{new Date(bug.timestamp.replace(" ", "T") + "Z").toLocaleString()}</span>
+          <span className="modal-time">{bug.timestamp ? new Date(bug.timestamp.replace(" ", "T") + "Z").toLocaleString() : "Unknown time"}</span>
         </div>
 
         <h3 className="modal-title">Bug Details</h3>
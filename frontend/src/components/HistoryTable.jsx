@@ -25,7 +25,10 @@ export default function HistoryTable({ history, onRowClick }) {
         <tbody>
           {history.map((row, idx) => {
             // Ensure format like YYYY-MM-DDTHH:MM:SSZ so JS Date parses it correctly in UTC
-            const localTime = new Date(row.timestamp.replace(" ", "T") + "Z").toLocaleString();
+            // Backfilled archive rows may have no known time (empty timestamp)
+            const localTime = row.timestamp
+              ? new Date(row.timestamp.replace(" ", "T") + "Z").toLocaleString()
+              : "Unknown";
             return (
             <tr 
               key={row.id} 
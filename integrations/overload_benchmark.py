@@ -0,0 +1,128 @@
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+
+# Configuration
+API_URL = "http://127.0.0.1:5000/api/v1/receive"
+
+FLOOD_SOURCE = "Noisy-Service"
+STEADY_SOURCE = "E-Commerce-Service"
+
+
+class SourceStats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, status, latency):
+        with self.lock:
+            self.statuses[status] += 1
+            if status == 201:
+                self.latencies.append(latency)
+
+
+def send(session, source, user_count, stats):
+    payload = {
+        "error_message": "Connection timeout to payment gateway",
+        "user_count": user_count,
+        "app_source": source,
+    }
+    start = time.perf_counter()
+    try:
+        status = session.post(API_URL, json=payload, timeout=10).status_code
+    except requests.RequestException:
+        status = "error"
+    stats.record(status, time.perf_counter() - start)
+
+
+def flood_worker(stop, stats):
+    session = requests.Session()
+    while not stop.is_set():
+        send(session, FLOOD_SOURCE, 1, stats)
+
+
+def steady_worker(stop, stats, rate, user_count):
+    session = requests.Session()
+    interval = 1.0 / rate
+    while not stop.is_set():
+        send(session, STEADY_SOURCE, user_count, stats)
+        time.sleep(interval)
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, stats):
+    lat = [v * 1000 for v in stats.latencies]
+    print(f"{name:<22} statuses={dict(stats.statuses)}")
+    print(f"{'':<22} p50={percentile(lat, 50):.1f}ms "
+          f"p95={percentile(lat, 95):.1f}ms p99={percentile(lat, 99):.1f}ms")
+    return percentile(lat, 95)
+
+
+def accepted_ratio(stats):
+    total = sum(stats.statuses.values())
+    return stats.statuses[201] / total if total else 0.0
+
+
+def run_phase(duration, flood_threads, steady_rate, steady_users):
+    stop = threading.Event()
+    flood_stats, steady_stats = SourceStats(), SourceStats()
+    threads = [threading.Thread(target=flood_worker, args=(stop, flood_stats))
+               for _ in range(flood_threads)]
+    threads.append(threading.Thread(
+        target=steady_worker, args=(stop, steady_stats, steady_rate, steady_users)
+    ))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return flood_stats, steady_stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure how a well-behaved source fares while another floods the API."
+    )
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per phase")
+    parser.add_argument("--flood-threads", type=int, default=32)
+    parser.add_argument("--steady-rate", type=float, default=5.0, help="req/s of the steady source")
+    parser.add_argument("--steady-users", type=int, default=10, help="user_count sent by the steady source")
+    parser.add_argument("--max-p95-ratio", type=float, default=2.0,
+                        help="fail if the steady source's p95 under overload exceeds baseline by this factor")
+    args = parser.parse_args()
+
+    print(f"📡 Benchmarking {API_URL}")
+    print("-" * 50)
+
+    # Both sources run from this host, as co-located services would
+    print("Baseline (steady source only):")
+    _, baseline = run_phase(args.duration, 0, args.steady_rate, args.steady_users)
+    baseline_p95 = report(STEADY_SOURCE, baseline)
+
+    print(f"\nOverload ({args.flood_threads} flooding threads):")
+    flood, steady = run_phase(args.duration, args.flood_threads, args.steady_rate, args.steady_users)
+    report(FLOOD_SOURCE, flood)
+    overload_p95 = report(STEADY_SOURCE, steady)
+
+    ratio = overload_p95 / baseline_p95 if baseline_p95 > 0 else float("inf")
+    accepted = accepted_ratio(steady)
+    print("-" * 50)
+    print(f"{STEADY_SOURCE}: p95 {baseline_p95:.1f}ms -> {overload_p95:.1f}ms "
+          f"(x{ratio:.2f}), {accepted:.0%} of requests accepted under overload")
+
+    if ratio > args.max_p95_ratio or accepted < 0.99:
+        print("❌ Well-behaved source degraded under overload")
+        sys.exit(1)
+    print("✅ Well-behaved source kept its latency under overload")
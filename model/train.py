@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import joblib
 from sklearn.model_selection import train_test_split
@@ -8,6 +9,14 @@ from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import StandardScaler
 import numpy as np
 
+parser = argparse.ArgumentParser(description="Train the bug severity model.")
+parser.add_argument(
+    "--shadow", action="store_true",
+    help="save as shadow_model.pkl to evaluate next to the live model before promoting it",
+)
+args = parser.parse_args()
+output_path = "shadow_model.pkl" if args.shadow else "model.pkl"
+
 # Load dataset
 data = pd.read_csv("../data/bugs.csv")
 
@@ -30,5 +39,5 @@ pipeline = Pipeline([
 pipeline.fit(X, y)
 
 # Save
-joblib.dump(pipeline, "model.pkl")
-print("✅ Model trained and saved — features: error_message (TF-IDF) + user_count (scaled)")
+joblib.dump(pipeline, output_path)
+print(f"✅ Model trained and saved to {output_path} — features: error_message (TF-IDF) + user_count (scaled)")